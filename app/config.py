@@ -12,6 +12,43 @@ class Settings(BaseSettings):
     SAAVN_BASE_URL: str = "https://www.jiosaavn.com/api.php"
     REQUEST_TIMEOUT: int = 10
     LOG_LEVEL: str = "INFO"
+    # Production server
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 0  # 0 means one worker per available CPU
+    KEEP_ALIVE_TIMEOUT: int = 5
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    # Total shutdown budget; the last UPSTREAM_DRAIN_TIMEOUT seconds of it
+    # are reserved for draining upstream calls
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    UPSTREAM_DRAIN_TIMEOUT: int = 5
+    UPSTREAM_POOL_SIZE: int = 32
+    # Song hydration
+    SONG_CACHE_TTL: int = 3600
+    SONG_CACHE_MAX_SIZE: int = 10000
+    SONG_BATCH_SIZE: int = 20
+    HYDRATION_CONCURRENCY: int = 4
+    # Admission control (per worker)
+    ADMISSION_ENABLED: bool = True
+    MAX_CONCURRENT_REQUESTS: int = 32
+    MAX_QUEUE_DEPTH: int = 100
+    QUEUE_TIMEOUT: float = 10.0
+    CLIENT_BUDGET: int = 300  # upstream calls a client may burst
+    CLIENT_BUDGET_REFILL: float = 5.0  # upstream calls per second
+    API_KEYS: str = ""  # comma-separated keys that get their own budget
+    MAX_TRACKED_CLIENTS: int = 10000  # IP budgets kept before evicting
+    SEARCH_SIZE_ESTIMATE: int = 5
+    ALBUM_SIZE_ESTIMATE: int = 15
+    PLAYLIST_SIZE_ESTIMATE: int = 50
+    OBSERVED_COST_TTL: int = 600  # seconds a measured request cost is reused
+    OBSERVED_COST_MAX_SIZE: int = 10000
+    # Tracing
+    TRACING_ENABLED: bool = True
+    SERVER_TIMING: bool = False  # on every response; for local use only
+    SERVER_TIMING_TOKEN: str = ""  # enables Server-Timing per request
+    TRACE_LOG_THRESHOLD_MS: float = 1000.0
+    TRACE_FULL_SPANS: bool = False  # log every span, not just totals
+    TRACE_MAX_SPANS: int = 500
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
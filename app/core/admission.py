@@ -0,0 +1,385 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional, Union
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.core.cache import RecordCache
+from app.core.tracing import span
+from app.services.http_client import UpstreamClient
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = "x-api-key"
+ADMITTED_PREFIXES = ("/song", "/album", "/playlist", "/lyrics")
+
+
+def _is_true(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _batches(songs: int) -> int:
+    return math.ceil(songs / max(settings.SONG_BATCH_SIZE, 1))
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed instead of being admitted.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class PriorityGate:
+    """
+    Concurrency limiter that hands free slots to the cheapest waiting request.
+    """
+
+    def __init__(self, limit: int, max_queue: int):
+        """
+        Initialize the gate.
+        Args:
+            limit (int): Requests allowed to run at the same time
+            max_queue (int): Requests allowed to wait for a slot
+        """
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, cost: int, timeout: float) -> None:
+        """
+        Wait for a slot, cheaper requests first.
+        Args:
+            cost (int): Estimated cost, used as the priority
+            timeout (float): Maximum number of seconds to wait
+        Raises:
+            Overloaded: If the queue is full or the wait times out
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Overloaded("queue_full", retry_after=1)
+        future = asyncio.get_running_loop().create_future()
+        entry = (cost, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Overloaded(
+                    "queue_timeout", retry_after=math.ceil(timeout)
+                ) from e
+            raise
+
+    def release(self) -> None:
+        """
+        Free a slot, handing it to the cheapest waiter if there is one.
+        """
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class ClientBudget:
+    """
+    Token bucket of upstream calls for a single API key or IP.
+    """
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self):
+        self.tokens = float(settings.CLIENT_BUDGET)
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> None:
+        """
+        Add the tokens earned since the last update, up to the full budget.
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            float(settings.CLIENT_BUDGET),
+            self.tokens
+            + (now - self.updated_at) * settings.CLIENT_BUDGET_REFILL,
+        )
+        self.updated_at = now
+
+    def credit(self, tokens: float) -> None:
+        """
+        Adjust the balance, never above the full budget.
+        Args:
+            tokens (float): Tokens to add (negative to charge)
+        """
+        self.tokens = min(float(settings.CLIENT_BUDGET), self.tokens + tokens)
+
+    def seconds_to_full(self) -> float:
+        """
+        Time until the budget has refilled completely, including any debt.
+        Returns:
+            float: Seconds until the balance reaches CLIENT_BUDGET
+        """
+        return (settings.CLIENT_BUDGET - self.tokens) / max(
+            settings.CLIENT_BUDGET_REFILL, 0.001
+        )
+
+
+class AdmissionControl:
+    """
+    Admission control for the API routers.
+    Every request is given a cost in expected upstream calls. Clients spend
+    that cost from a refilling budget, requests wait for a slot in cost order,
+    and anything that cannot be served soon is rejected with 429.
+    """
+
+    def __init__(self, app: FastAPI):
+        """
+        Register the admission middleware.
+        Args:
+            app (FastAPI): FastAPI application instance
+        """
+        self.gate = PriorityGate(
+            settings.MAX_CONCURRENT_REQUESTS, settings.MAX_QUEUE_DEPTH
+        )
+        # Budgets are stored until they would have refilled completely
+        # (see _store_budget); this is the longest that takes without debt
+        budget_ttl = math.ceil(ClientBudget().seconds_to_full()) + 1
+        self._api_keys = frozenset(
+            key.strip() for key in settings.API_KEYS.split(",") if key.strip()
+        )
+        # Known keys get a slot each, so churning IPs cannot evict them
+        self._key_budgets = RecordCache(budget_ttl, len(self._api_keys))
+        self._ip_budgets = RecordCache(
+            budget_ttl, settings.MAX_TRACKED_CLIENTS
+        )
+        # Actual upstream calls last seen for a path and query
+        self._observed_costs = RecordCache(
+            settings.OBSERVED_COST_TTL, settings.OBSERVED_COST_MAX_SIZE
+        )
+        self._waits = deque(maxlen=1000)
+        self._counters = {
+            "admitted": 0,
+            "shed_budget": 0,
+            "shed_queue_full": 0,
+            "shed_queue_timeout": 0,
+        }
+
+        @app.middleware("http")
+        async def admission_middleware(request: Request, call_next):
+            """
+            Admit, queue or shed requests to the API routers.
+            Args:
+                request (Request): Incoming request
+                call_next: Next handler in the chain
+            Returns:
+                Response: Route response or 429 error response
+            """
+            path = request.url.path
+            if not settings.ADMISSION_ENABLED or not path.startswith(
+                ADMITTED_PREFIXES
+            ):
+                return await call_next(request)
+            return await self._admit(request, call_next)
+
+    def client_id(self, request: Request) -> str:
+        """
+        Identify the client by API key if it is one of API_KEYS, otherwise
+        by its IP address.
+        Args:
+            request (Request): Incoming request
+        Returns:
+            str: Client identifier
+        """
+        api_key = request.headers.get(API_KEY_HEADER)
+        if api_key in self._api_keys:
+            return f"key:{api_key}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    def _budgets(self, client: str) -> RecordCache:
+        """
+        Budget store for a client identifier.
+        Args:
+            client (str): Client identifier from `client_id`
+        Returns:
+            RecordCache: Store holding the client's budget
+        """
+        if client.startswith("key:"):
+            return self._key_budgets
+        return self._ip_budgets
+
+    @staticmethod
+    def estimate_cost(path: str, params: Dict[str, str]) -> int:
+        """
+        Estimate the upstream calls a request will make.
+        Args:
+            path (str): Request path
+            params (Dict[str, str]): Query parameters
+        Returns:
+            int: Expected number of upstream calls
+        """
+        lyrics = _is_true(params.get("lyrics", "false"))
+        path = path.rstrip("/")
+        if path == "/song/get":
+            return 1 + lyrics
+        if path == "/song":
+            if not _is_true(params.get("songdata", "true")):
+                return 1
+            songs = settings.SEARCH_SIZE_ESTIMATE
+            return 1 + _batches(songs) + lyrics * songs
+        if path in ("/album", "/playlist"):
+            songs = (
+                settings.ALBUM_SIZE_ESTIMATE
+                if path == "/album"
+                else settings.PLAYLIST_SIZE_ESTIMATE
+            )
+            return 2 + _batches(songs) + lyrics * songs
+        if path == "/lyrics":
+            return 2 if "http" in params.get("query", "") else 1
+        return 1
+
+    def _cost(self, request: Request) -> tuple:
+        """
+        Cost of a request, preferring what the same request cost last time.
+        Args:
+            request (Request): Incoming request
+        Returns:
+            tuple: (cost key, estimated cost)
+        """
+        params = dict(request.query_params)
+        key = f"{request.url.path}?{sorted(params.items())}"
+        observed = self._observed_costs.get(key)
+        if observed is not None:
+            return key, max(observed, 1)
+        return key, self.estimate_cost(request.url.path, params)
+
+    def _store_budget(self, client: str, budget: ClientBudget) -> None:
+        """
+        Save a client's budget until it would have refilled completely, so
+        that debt from requests costing more than estimated is not forgiven.
+        Args:
+            client (str): Client identifier from `client_id`
+            budget (ClientBudget): Budget to save
+        """
+        self._budgets(client).put(
+            client, budget, ttl=math.ceil(budget.seconds_to_full()) + 1
+        )
+
+    def _shed(self, reason: str, retry_after: int) -> JSONResponse:
+        """
+        Build the 429 response for a shed request.
+        Args:
+            reason (str): Why the request was shed
+            retry_after (int): Seconds the client should wait
+        Returns:
+            JSONResponse: Standardized error response
+        """
+        self._counters[f"shed_{reason}"] += 1
+        logger.warning(
+            "Request shed (%s), retry after %ds", reason, retry_after
+        )
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(max(retry_after, 1))},
+            content={
+                "status": "error",
+                "message": "Too many requests",
+                "details": reason,
+            },
+        )
+
+    async def _admit(self, request: Request, call_next):
+        """
+        Charge the client's budget, wait for a slot and run the request.
+        Args:
+            request (Request): Incoming request
+            call_next: Next handler in the chain
+        Returns:
+            Response: Route response or 429 error response
+        """
+        client = self.client_id(request)
+        cost_key, cost = self._cost(request)
+        budget = self._budgets(client).get(client) or ClientBudget()
+        budget.refill()
+        # A request costing more than the whole budget needs a full bucket
+        required = min(cost, settings.CLIENT_BUDGET)
+        if budget.tokens < required:
+            self._store_budget(client, budget)
+            retry_after = math.ceil(
+                (required - budget.tokens)
+                / max(settings.CLIENT_BUDGET_REFILL, 0.001)
+            )
+            return self._shed("budget", retry_after)
+        budget.credit(-cost)
+        self._store_budget(client, budget)
+
+        started = time.monotonic()
+        try:
+            with span("admission_queue", cost=cost):
+                await self.gate.acquire(cost, settings.QUEUE_TIMEOUT)
+        except Overloaded as e:
+            budget.credit(cost)
+            return self._shed(e.reason, e.retry_after)
+        self._waits.append(time.monotonic() - started)
+        self._counters["admitted"] += 1
+        response = None
+        with UpstreamClient.count_calls() as counter:
+            try:
+                response = await call_next(request)
+                return response
+            finally:
+                self.gate.release()
+                # Charge what the request actually cost upstream
+                budget.credit(cost - counter.count)
+                self._store_budget(client, budget)
+                # Failed requests often stop early and would look cheap
+                if response is not None and 200 <= response.status_code < 300:
+                    self._observed_costs.put(cost_key, counter.count)
+
+    def stats(self) -> Dict[str, Union[int, float, Optional[float]]]:
+        """
+        Queue and wait-time metrics for this worker.
+        Returns:
+            Dict: Current admission metrics
+        """
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(int(len(waits) * p), len(waits) - 1)], 4)
+
+        return {
+            "active": self.gate.active,
+            "limit": self.gate.limit,
+            "queue_depth": self.gate.queue_depth,
+            "max_queue_depth": self.gate.max_queue,
+            "wait_p50_seconds": percentile(0.5),
+            "wait_p95_seconds": percentile(0.95),
+            "wait_max_seconds": round(waits[-1], 4) if waits else None,
+            "tracked_clients": len(self._key_budgets) + len(self._ip_budgets),
+            **self._counters,
+        }
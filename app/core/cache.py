@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class RecordCache:
+    """
+    Thread-safe in-memory cache with a per-entry TTL and LRU eviction.
+    Supports single-flight loading: the first caller to claim a missing key
+    loads it, later callers wait for that load instead of repeating it.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        """
+        Initialize the cache.
+        Args:
+            ttl (int): Seconds an entry stays fresh
+            max_size (int): Maximum number of entries before evicting the least recently used
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_locked(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_locked(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a fresh entry.
+        Args:
+            key (str): Cache key
+        Returns:
+            Optional[Any]: Cached value, or None if missing or stale
+        """
+        with self._lock:
+            return self._get_locked(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several entries at once.
+        Args:
+            keys (Iterable[str]): Cache keys
+        Returns:
+            Dict[str, Any]: Fresh entries found, keyed by cache key
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store an entry, evicting the least recently used one if full.
+        Args:
+            key (str): Cache key
+            value (Any): Value to store
+            ttl (float, optional): Seconds this entry stays fresh. Defaults to the cache TTL.
+        """
+        with self._lock:
+            self._put_locked(key, value, ttl)
+
+    def claim(
+        self, keys: Iterable[str]
+    ) -> Tuple[Dict[str, Any], List[str], Dict[str, Future]]:
+        """
+        Look up entries and claim the missing ones for loading.
+        Every claimed key must be finished with `resolve`.
+        Args:
+            keys (Iterable[str]): Cache keys
+        Returns:
+            Tuple: (fresh entries found, keys claimed by this caller,
+                futures for keys another caller is already loading)
+        """
+        found, claimed, pending = {}, [], {}
+        with self._lock:
+            for key in keys:
+                value = self._get_locked(key)
+                if value is not None:
+                    found[key] = value
+                elif key in self._pending:
+                    pending[key] = self._pending[key]
+                else:
+                    self._pending[key] = Future()
+                    claimed.append(key)
+        return found, claimed, pending
+
+    def resolve(
+        self,
+        key: str,
+        value: Optional[Any] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """
+        Finish loading a claimed key, caching the value and waking waiters.
+        Args:
+            key (str): Claimed cache key
+            value (Any, optional): Loaded value, None if it does not exist
+            error (BaseException, optional): Load failure to pass to waiters
+        """
+        with self._lock:
+            future = self._pending.pop(key, None)
+            if value is not None and error is None:
+                self._put_locked(key, value)
+        if future is not None and not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -3,6 +3,8 @@ import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
+from app.core.tracing import REQUEST_ID_HEADER, get_request_id
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,21 +21,36 @@ class GlobalExceptionHandler:
         """
 
         @app.exception_handler(Exception)
-        async def global_exception_handler(_request: Request, exc: Exception):
+        async def global_exception_handler(request: Request, exc: Exception):
             """
             Handle unexpected exceptions across the application.
             Args:
-                _request (Request): Incoming request
+                request (Request): Incoming request
                 exc (Exception): Raised exception
             Returns:
                 JSONResponse: Standardized error response
             """
-            logger.error("Unexpected error: %s", str(exc), exc_info=True)
+            # The tracing middleware has finished by the time this runs
+            request_id = get_request_id() or getattr(
+                request.state, "request_id", None
+            )
+            logger.error(
+                "Unexpected error on %s %s: %s",
+                request.method,
+                request.url.path,
+                str(exc),
+                exc_info=True,
+                extra={"request_id": request_id},
+            )
             return JSONResponse(
                 status_code=500,
+                headers=(
+                    {REQUEST_ID_HEADER: request_id} if request_id else None
+                ),
                 content={
                     "status": "error",
                     "message": "An unexpected error occurred",
                     "details": str(exc),
+                    "request_id": request_id,
                 },
             )
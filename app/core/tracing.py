@@ -0,0 +1,366 @@
+import asyncio
+import functools
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.routing import APIRoute
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("app.trace")
+
+REQUEST_ID_HEADER = "X-Request-ID"
+SERVER_TIMING_TOKEN_HEADER = "X-Server-Timing-Token"
+LOG_FORMAT = (
+    "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+)
+
+
+class Span:
+    """
+    A timed operation within a request.
+    """
+
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def set(self, **attributes) -> None:
+        """
+        Add attributes to the span.
+        """
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """
+    All spans recorded for one request.
+    Individual spans are only kept when TRACE_FULL_SPANS is set, and spans
+    past TRACE_MAX_SPANS are only counted in the per-name totals.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self.totals: Dict[str, List[float]] = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        """
+        Record a finished span.
+        Args:
+            span (Span): Finished span
+        """
+        with self._lock:
+            total = self.totals.setdefault(span.name, [0, 0.0])
+            total[0] += 1
+            total[1] += span.duration_ms
+            if not settings.TRACE_FULL_SPANS:
+                return
+            if len(self.spans) < settings.TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def server_timing(self) -> str:
+        """
+        Render per-name span totals as a Server-Timing header value.
+        Returns:
+            str: Header value
+        """
+        return ", ".join(
+            f'{name};dur={duration:.1f};desc="{count}x"'
+            for name, (count, duration) in self.totals.items()
+        )
+
+    def to_dict(self) -> Dict:
+        """
+        Serialize the trace for structured logging.
+        Returns:
+            Dict: Per-name span totals, plus the spans relative to the
+                request start when TRACE_FULL_SPANS is set
+        """
+        data = {
+            "request_id": self.request_id,
+            "totals": {
+                name: {"count": count, "duration_ms": round(duration, 2)}
+                for name, (count, duration) in self.totals.items()
+            },
+        }
+        if not settings.TRACE_FULL_SPANS:
+            return data
+        return {
+            **data,
+            "spans": [
+                {
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ms": round((span.start - self.start) * 1000, 2),
+                    "duration_ms": round(span.duration_ms, 2),
+                    "attributes": span.attributes,
+                }
+                for span in self.spans
+            ],
+            "dropped_spans": self.dropped,
+        }
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar(
+    "current_span", default=None
+)
+# End times stamped by endpoints, read by the route to time serialization
+_endpoint_finished: ContextVar[Optional[List[float]]] = ContextVar(
+    "endpoint_finished", default=None
+)
+
+
+def get_request_id() -> Optional[str]:
+    """
+    Request ID of the request being handled in this context.
+    Returns:
+        Optional[str]: Request ID, or None outside a request
+    """
+    trace = _trace.get()
+    return trace.request_id if trace is not None else None
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Time a block of work as a span of the current request.
+    Outside a traced request this does nothing and yields None.
+    Args:
+        name (str): Span name, e.g. "upstream" or "decode"
+        **attributes: Initial span attributes
+    Yields:
+        Optional[Span]: The span, for adding attributes
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        trace.add(current)
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    """
+    Wrap a route endpoint in an "endpoint" span.
+    Args:
+        endpoint (Callable): Route endpoint, sync or async
+    Returns:
+        Callable: Wrapped endpoint with the same signature
+    """
+    if getattr(endpoint, "__traced__", False):
+        # Routes are rebuilt from their endpoint by include_router
+        return endpoint
+
+    def stamp() -> None:
+        holder = _endpoint_finished.get()
+        if holder is not None:
+            holder.append(time.perf_counter())
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                with span("endpoint"):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                stamp()
+
+        async_wrapper.__traced__ = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            with span("endpoint"):
+                return endpoint(*args, **kwargs)
+        finally:
+            stamp()
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """
+    API route that records the endpoint and response serialization as spans.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request: Request):
+            trace = _trace.get()
+            if trace is None:
+                return await handler(request)
+            finished: List[float] = []
+            _endpoint_finished.set(finished)
+            with span("route", route=self.path_format) as route_span:
+                response = await handler(request)
+            if finished:
+                # Everything after the endpoint returned is serialization
+                serialize = Span("serialize", route_span.span_id, {})
+                serialize.start = finished[-1]
+                serialize.end = route_span.end
+                trace.add(serialize)
+            return response
+
+        return traced_handler
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Logging filter that adds the current request ID to every record.
+    A request ID passed through `extra` takes precedence.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = (
+            getattr(record, "request_id", None) or get_request_id() or "-"
+        )
+        return True
+
+
+_logging_configured = False
+
+
+def configure_logging() -> None:
+    """
+    Configure process-wide logging: request IDs on every application log
+    line, and traces as bare JSON lines on their own handler.
+    Safe to call more than once.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    logging.basicConfig(level=settings.LOG_LEVEL, format=LOG_FORMAT)
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(RequestIdFilter())
+    trace_handler = logging.StreamHandler()
+    trace_handler.setFormatter(logging.Formatter("%(message)s"))
+    trace_logger.addHandler(trace_handler)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+
+def _wants_server_timing(request: Request) -> bool:
+    """
+    Check whether a response should carry the Server-Timing header.
+    Args:
+        request (Request): Incoming request
+    Returns:
+        bool: True if SERVER_TIMING is on or the request sent a valid token
+    """
+    if settings.SERVER_TIMING:
+        return True
+    token = request.headers.get(SERVER_TIMING_TOKEN_HEADER)
+    if not settings.SERVER_TIMING_TOKEN or not token:
+        return False
+    return hmac.compare_digest(
+        token.encode(), settings.SERVER_TIMING_TOKEN.encode()
+    )
+
+
+class RequestTracing:
+    """
+    Request ID propagation and per-request tracing for the FastAPI application.
+    """
+
+    def __init__(self, app: FastAPI):
+        """
+        Register the tracing middleware.
+        Args:
+            app (FastAPI): FastAPI application instance
+        """
+
+        @app.middleware("http")
+        async def tracing_middleware(request: Request, call_next):
+            """
+            Assign a request ID, collect spans and emit the trace.
+            Args:
+                request (Request): Incoming request
+                call_next: Next handler in the chain
+            Returns:
+                Response: Response with X-Request-ID (and Server-Timing) headers
+            """
+            if not settings.TRACING_ENABLED:
+                return await call_next(request)
+            request_id = (
+                request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+            )[:64]
+            # Kept on the request for handlers that run after the trace ends
+            request.state.request_id = request_id
+            trace = Trace(request_id)
+            token = _trace.set(trace)
+            status_code = 500
+            try:
+                response = await call_next(request)
+                status_code = response.status_code
+                response.headers[REQUEST_ID_HEADER] = request_id
+                if _wants_server_timing(request):
+                    total = (time.perf_counter() - trace.start) * 1000
+                    timing = trace.server_timing()
+                    response.headers["Server-Timing"] = (
+                        f"{timing}, total;dur={total:.1f}"
+                        if timing
+                        else f"total;dur={total:.1f}"
+                    )
+                return response
+            finally:
+                duration_ms = (time.perf_counter() - trace.start) * 1000
+                if duration_ms >= settings.TRACE_LOG_THRESHOLD_MS:
+                    trace_logger.info(
+                        json.dumps(
+                            {
+                                "method": request.method,
+                                "path": request.url.path,
+                                "status": status_code,
+                                "duration_ms": round(duration_ms, 2),
+                                **trace.to_dict(),
+                            },
+                            default=str,
+                        )
+                    )
+                _trace.reset(token)
@@ -2,14 +2,15 @@ from typing import Union
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.tracing import TracedRoute
 from app.schemas.album_schema import AlbumSchema
 from app.services.saavn_service import SaavnService
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=Union[dict, AlbumSchema])
-async def get_album(
+def get_album(
     query: str = Query(..., description="Album URL or ID"),
     lyrics: bool = Query(False, description="Include song lyrics"),
 ):
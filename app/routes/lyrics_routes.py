@@ -2,13 +2,14 @@ from typing import Dict, Union
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.tracing import TracedRoute
 from app.services.saavn_service import SaavnService
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=Dict[str, Union[bool, str]])
-async def get_lyrics(
+def get_lyrics(
     query: str = Query(..., description="Song URL, link, or direct lyrics ID")
 ):
     """
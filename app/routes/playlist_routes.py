@@ -2,14 +2,15 @@ from typing import Union
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.tracing import TracedRoute
 from app.schemas.playlist_schema import PlaylistSchema
 from app.services.saavn_service import SaavnService
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=Union[dict, PlaylistSchema])
-async def get_playlist(
+def get_playlist(
     query: str = Query(..., description="Playlist URL or ID"),
     lyrics: bool = Query(False, description="Include song lyrics"),
 ):
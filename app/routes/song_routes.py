@@ -2,14 +2,15 @@ from typing import List, Union
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.tracing import TracedRoute
 from app.schemas.song_schema import SongSchema
 from app.services.saavn_service import SaavnService
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=List[Union[dict, SongSchema]])
-async def search_songs(
+def search_songs(
     query: str = Query(..., description="Search query for songs"),
     lyrics: bool = Query(False, description="Include song lyrics"),
     songdata: bool = Query(True, description="Fetch full song details"),
@@ -36,7 +37,7 @@ async def search_songs(
 
 
 @router.get("/get", response_model=Union[dict, SongSchema])
-async def get_song(
+def get_song(
     song_id: str = Query(..., description="Song ID"),
     lyrics: bool = Query(False, description="Include song lyrics"),
 ):
@@ -0,0 +1,97 @@
+import importlib.util
+import logging
+import math
+import os
+
+import uvicorn
+
+from app.config import settings
+from app.core.tracing import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def _available_cpus() -> int:
+    """
+    Count the CPUs this process may use, honouring CPU affinity and the
+    cgroup v2 CPU quota set by container runtimes.
+    Returns:
+        int: Number of usable CPUs, at least 1
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+def _worker_count() -> int:
+    """
+    Resolve the number of worker processes.
+    Returns:
+        int: WORKERS if set, otherwise one worker per available CPU
+    """
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    return _available_cpus()
+
+
+def _has_module(name: str) -> bool:
+    """
+    Check whether an optional module is installed without importing it.
+    Args:
+        name (str): Module name
+    Returns:
+        bool: True if the module can be imported
+    """
+    return importlib.util.find_spec(name) is not None
+
+
+def run() -> None:
+    """
+    Run the API with production settings: multiple workers, no reloader,
+    uvloop/httptools when available and a bounded graceful shutdown.
+    """
+    configure_logging()
+    loop = "uvloop" if _has_module("uvloop") else "asyncio"
+    http = "httptools" if _has_module("httptools") else "h11"
+    workers = _worker_count()
+    logger.info(
+        "Starting server on %s:%d with %d workers (loop=%s, http=%s)",
+        settings.HOST,
+        settings.PORT,
+        workers,
+        loop,
+        http,
+    )
+    uvicorn.run(
+        "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        reload=False,
+        access_log=settings.DEBUG,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+        # The rest of the shutdown budget is used by the upstream drain
+        timeout_graceful_shutdown=max(
+            settings.GRACEFUL_SHUTDOWN_TIMEOUT
+            - settings.UPSTREAM_DRAIN_TIMEOUT,
+            1,
+        ),
+        log_level=settings.LOG_LEVEL.lower(),
+    )
+
+
+if __name__ == "__main__":
+    run()
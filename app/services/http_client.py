@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from app.config import settings
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class CallCounter:
+    """
+    Number of upstream calls made on behalf of a single client request.
+    """
+
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+
+_call_counter: ContextVar[Optional[CallCounter]] = ContextVar(
+    "upstream_call_counter", default=None
+)
+
+
+class UpstreamClient:
+    """
+    Shared HTTP client for all calls to JioSaavn.
+    Keeps a pooled session per process and tracks in-flight calls so that
+    shutdown can wait for them to finish before closing the pool.
+    """
+
+    _session = None
+    _lock = threading.Lock()
+    _idle = threading.Condition(_lock)
+    _in_flight = 0
+    _closing = False
+
+    @classmethod
+    def _get_session(cls):
+        """
+        Create the pooled session on first use.
+        `requests` is imported here so that it is not paid for at import time.
+        Returns:
+            requests.Session: Shared session
+        """
+        if cls._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.UPSTREAM_POOL_SIZE,
+                pool_maxsize=settings.UPSTREAM_POOL_SIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def get(cls, url: str, timeout: Optional[float] = None):
+        """
+        Perform a GET request against an upstream URL.
+        Args:
+            url (str): URL to fetch
+            timeout (float, optional): Timeout in seconds. Defaults to REQUEST_TIMEOUT.
+        Returns:
+            requests.Response: Upstream response
+        """
+        with cls._lock:
+            if cls._closing:
+                raise RuntimeError("Upstream client is shutting down")
+            session = cls._get_session()
+            cls._in_flight += 1
+            counter = _call_counter.get()
+            if counter is not None:
+                counter.count += 1
+        if timeout is None:
+            timeout = settings.REQUEST_TIMEOUT
+        call = parse_qs(urlsplit(url).query).get("__call", ["page"])[0]
+        try:
+            with span("upstream", call=call) as upstream_span:
+                response = session.get(url, timeout=timeout)
+                if upstream_span is not None:
+                    upstream_span.set(
+                        status=response.status_code,
+                        bytes=len(response.content),
+                    )
+                return response
+        finally:
+            with cls._lock:
+                cls._in_flight -= 1
+                if cls._in_flight == 0:
+                    cls._idle.notify_all()
+
+    @classmethod
+    @contextmanager
+    def count_calls(cls) -> Iterator[CallCounter]:
+        """
+        Count upstream calls made from the current context until the block exits.
+        Yields:
+            CallCounter: Counter updated by every call made inside the block
+        """
+        counter = CallCounter()
+        token = _call_counter.set(counter)
+        try:
+            yield counter
+        finally:
+            _call_counter.reset(token)
+
+    @classmethod
+    def in_flight(cls) -> int:
+        """
+        Number of upstream calls currently in progress.
+        Returns:
+            int: In-flight call count
+        """
+        return cls._in_flight
+
+    @classmethod
+    def drain(cls, timeout: float) -> bool:
+        """
+        Stop accepting new upstream calls and wait for in-flight ones to finish.
+        Args:
+            timeout (float): Maximum number of seconds to wait
+        Returns:
+            bool: True if all in-flight calls finished in time
+        """
+        deadline = time.monotonic() + timeout
+        with cls._lock:
+            cls._closing = True
+            while cls._in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        "Shutdown with %d upstream calls still in flight",
+                        cls._in_flight,
+                    )
+                    return False
+                cls._idle.wait(remaining)
+        return True
+
+    @classmethod
+    def close(cls) -> None:
+        """
+        Close the pooled session and allow a fresh one to be created later.
+        """
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+            cls._closing = False
@@ -1,12 +1,16 @@
+import contextvars
 import json
 import logging
 import re
-from typing import Dict, List, Optional, Union
-
-import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Union
 
 from app.config import settings
+from app.core.cache import RecordCache
+from app.core.tracing import span
 from app.services.crypto_service import CryptoService
+from app.services.http_client import UpstreamClient
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,57 @@ class SaavnService:
     """
 
     BASE_URL = settings.SAAVN_BASE_URL
+    # Formatted songs and lyrics, shared by songs, albums, playlists and search
+    _song_cache = RecordCache(
+        settings.SONG_CACHE_TTL, settings.SONG_CACHE_MAX_SIZE
+    )
+    _lyrics_cache = RecordCache(
+        settings.SONG_CACHE_TTL, settings.SONG_CACHE_MAX_SIZE
+    )
+    # Threads for parallel upstream calls, shared by all requests in a worker
+    _executor = ThreadPoolExecutor(
+        max_workers=max(
+            settings.HYDRATION_CONCURRENCY * settings.MAX_CONCURRENT_REQUESTS,
+            1,
+        ),
+        thread_name_prefix="hydration",
+    )
+
+    @classmethod
+    def _map_concurrently(cls, func: Callable, items: List) -> List:
+        """
+        Apply a blocking function to each item, in parallel when there is more than one.
+        At most HYDRATION_CONCURRENCY items of one call are processed at a time.
+        Args:
+            func (Callable): Function to apply
+            items (List): Items to process
+        Returns:
+            List: Results in the same order as items
+        """
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        results = [None] * len(items)
+        queue = deque(enumerate(items))
+
+        def work() -> None:
+            while True:
+                try:
+                    index, item = queue.popleft()
+                except IndexError:
+                    return
+                results[index] = func(item)
+
+        workers = min(len(items), max(settings.HYDRATION_CONCURRENCY, 1))
+        # Each task runs in a copy of the request context so per-request
+        # state (e.g. upstream call counters) follows it into the pool
+        futures = [
+            cls._executor.submit(contextvars.copy_context().run, work)
+            for _ in range(workers)
+        ]
+        wait(futures)
+        for future in futures:
+            future.result()
+        return results
 
     @classmethod
     def _format_string(cls, string: str) -> str:
@@ -45,15 +100,16 @@ class SaavnService:
             str: Song ID
         """
         try:
-            res = requests.get(url, timeout=settings.REQUEST_TIMEOUT)
-            try:
-                return (res.text.split('"pid":"'))[1].split('","')[0]
-            except IndexError:
-                return (
-                    res.text.split('"song":{"type":"')[1]
-                    .split('","image":')[0]
-                    .split('"id":"')[-1]
-                )
+            with span("resolve_id", kind="song"):
+                res = UpstreamClient.get(url)
+                try:
+                    return (res.text.split('"pid":"'))[1].split('","')[0]
+                except IndexError:
+                    return (
+                        res.text.split('"song":{"type":"')[1]
+                        .split('","image":')[0]
+                        .split('"id":"')[-1]
+                    )
         except Exception as e:
             logger.error("Error extracting song ID: %s", e)
             raise
@@ -68,11 +124,12 @@ class SaavnService:
             str: Album ID
         """
         try:
-            res = requests.get(input_url, timeout=settings.REQUEST_TIMEOUT)
-            try:
-                return res.text.split('"album_id":"')[1].split('"')[0]
-            except IndexError:
-                return res.text.split('"page_id","')[1].split('","')[0]
+            with span("resolve_id", kind="album"):
+                res = UpstreamClient.get(input_url)
+                try:
+                    return res.text.split('"album_id":"')[1].split('"')[0]
+                except IndexError:
+                    return res.text.split('"page_id","')[1].split('","')[0]
         except Exception as e:
             logger.error("Error extracting album ID: %s", e)
             raise
@@ -87,13 +144,14 @@ class SaavnService:
             str: Playlist ID
         """
         try:
-            res = requests.get(input_url, timeout=settings.REQUEST_TIMEOUT)
-            try:
-                return res.text.split('"type":"playlist","id":"')[1].split(
-                    '"'
-                )[0]
-            except IndexError:
-                return res.text.split('"page_id","')[1].split('","')[0]
+            with span("resolve_id", kind="playlist"):
+                res = UpstreamClient.get(input_url)
+                try:
+                    return res.text.split('"type":"playlist","id":"')[1].split(
+                        '"'
+                    )[0]
+                except IndexError:
+                    return res.text.split('"page_id","')[1].split('","')[0]
         except Exception as e:
             logger.error("Error extracting playlist ID: %s", e)
             raise
@@ -111,22 +169,142 @@ class SaavnService:
             Optional[Dict]: Processed song data
         """
         try:
-            song_url = f"{cls.BASE_URL}?__call=song.getDetails&cc=in&_marker=0%3F_marker%3D0&_format=json&pids={song_id}"
-            song_response = requests.get(
-                song_url, timeout=settings.REQUEST_TIMEOUT
-            )
-            song_data = song_response.text.encode().decode("unicode-escape")
-            song_data = json.loads(song_data)
-            if song_id not in song_data:
-                return None
-            processed_song = cls.format_song_data(
-                song_data[song_id], include_lyrics
-            )
-            return processed_song
+            songs = cls.get_songs([song_id], include_lyrics)
+            return songs.get(song_id)
         except Exception as e:
             logger.error("Error fetching song details: %s", e)
             raise
 
+    @classmethod
+    def _fetch_song_details(cls, song_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch raw details for a batch of songs in a single upstream call.
+        Args:
+            song_ids (List[str]): Song IDs
+        Returns:
+            Dict[str, Dict]: Raw song data keyed by song ID
+        """
+        pids = ",".join(song_ids)
+        song_url = f"{cls.BASE_URL}?__call=song.getDetails&cc=in&_marker=0%3F_marker%3D0&_format=json&pids={pids}"
+        song_response = UpstreamClient.get(song_url)
+        with span("decode", call="song.getDetails"):
+            song_data = song_response.text.encode().decode("unicode-escape")
+            song_data = json.loads(song_data)
+        return {
+            song_id: song_data[song_id]
+            for song_id in song_ids
+            if isinstance(song_data.get(song_id), dict)
+        }
+
+    @classmethod
+    def get_songs(
+        cls,
+        song_ids: List[str],
+        include_lyrics: bool = False,
+        fallback: Optional[Dict[str, Dict]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Retrieve formatted songs, using the song cache where possible.
+        Songs that are missing or stale are fetched in batches of SONG_BATCH_SIZE,
+        with up to HYDRATION_CONCURRENCY batches in flight. Songs another request
+        is already fetching are waited for rather than fetched again.
+        Fallback songs are never cached.
+        Args:
+            song_ids (List[str]): Song IDs, duplicates allowed
+            include_lyrics (bool, optional): Whether to include lyrics. Defaults to False.
+            fallback (Dict[str, Dict], optional): Raw song data to use when upstream
+                does not return a song, e.g. songs embedded in an album. Defaults to None.
+        Returns:
+            Dict[str, Dict]: Processed song data keyed by song ID
+        """
+        unique_ids = list(dict.fromkeys(song_ids))
+        fallback = fallback or {}
+        songs, claimed, pending = cls._song_cache.claim(unique_ids)
+        if claimed:
+            resolved = set()
+            try:
+                batch_size = max(settings.SONG_BATCH_SIZE, 1)
+                batches = [
+                    claimed[i : i + batch_size]
+                    for i in range(0, len(claimed), batch_size)
+                ]
+                fetched = {}
+                for batch in cls._map_concurrently(
+                    cls._fetch_song_details, batches
+                ):
+                    fetched.update(batch)
+                for song_id in claimed:
+                    song = None
+                    if song_id in fetched:
+                        with span("format_song", song_id=song_id):
+                            song = cls.format_song_data(fetched[song_id])
+                        songs[song_id] = song
+                    cls._song_cache.resolve(song_id, song)
+                    resolved.add(song_id)
+            except Exception as e:
+                for song_id in claimed:
+                    if song_id not in resolved:
+                        cls._song_cache.resolve(song_id, error=e)
+                if not fallback:
+                    raise
+                logger.warning(
+                    "Song hydration failed, using embedded data: %s", e
+                )
+        for song_id, future in pending.items():
+            try:
+                # Another request is fetching this song; its batch may need
+                # a few upstream round trips
+                song = future.result(timeout=settings.REQUEST_TIMEOUT * 3)
+            except Exception as e:
+                if not fallback:
+                    raise
+                logger.warning(
+                    "Song hydration failed, using embedded data: %s", e
+                )
+                song = None
+            if song is not None:
+                songs[song_id] = song
+        for song_id in unique_ids:
+            if song_id not in songs and song_id in fallback:
+                with span("format_song", song_id=song_id, fallback=True):
+                    songs[song_id] = cls.format_song_data(fallback[song_id])
+        # Hand out copies so per-request changes (lyrics) never reach the cache
+        songs = {song_id: dict(song) for song_id, song in songs.items()}
+        if include_lyrics:
+            with_lyrics = [
+                song
+                for song in songs.values()
+                if song.get("has_lyrics") == "true"
+            ]
+            lyrics = cls._map_concurrently(
+                cls.get_lyrics, [song["id"] for song in with_lyrics]
+            )
+            for song, song_lyrics in zip(with_lyrics, lyrics):
+                song["lyrics"] = song_lyrics
+        return songs
+
+    @classmethod
+    def _hydrate_songs(
+        cls, embedded_songs: List[Dict], include_lyrics: bool
+    ) -> List[Dict]:
+        """
+        Replace songs embedded in an album or playlist with shared formatted songs.
+        Args:
+            embedded_songs (List[Dict]): Raw songs as embedded by upstream
+            include_lyrics (bool): Whether to include lyrics
+        Returns:
+            List[Dict]: Processed songs in the original order
+        """
+        embedded = {song["id"]: song for song in embedded_songs}
+        songs = cls.get_songs(
+            [song["id"] for song in embedded_songs],
+            include_lyrics,
+            fallback=embedded,
+        )
+        return [
+            songs[song["id"]] for song in embedded_songs if song["id"] in songs
+        ]
+
     @classmethod
     def get_album(
         cls, album_id: str, include_lyrics: bool = False
@@ -141,11 +319,10 @@ class SaavnService:
         """
         try:
             album_url = f"{cls.BASE_URL}?__call=content.getAlbumDetails&_format=json&cc=in&_marker=0%3F_marker%3D0&albumid={album_id}"
-            response = requests.get(
-                album_url, timeout=settings.REQUEST_TIMEOUT
-            )
-            album_data = response.text.encode().decode("unicode-escape")
-            album_data = json.loads(album_data)
+            response = UpstreamClient.get(album_url)
+            with span("decode", call="content.getAlbumDetails"):
+                album_data = response.text.encode().decode("unicode-escape")
+                album_data = json.loads(album_data)
             # Process album data
             album_data["image"] = album_data["image"].replace(
                 "150x150", "500x500"
@@ -155,8 +332,9 @@ class SaavnService:
                 album_data["primary_artists"]
             )
             # Process songs in the album
-            for song in album_data["songs"]:
-                cls.format_song_data(song, include_lyrics)
+            album_data["songs"] = cls._hydrate_songs(
+                album_data["songs"], include_lyrics
+            )
             return album_data
         except Exception as e:
             logger.error("Error fetching album details: %s", e)
@@ -176,11 +354,10 @@ class SaavnService:
         """
         try:
             playlist_url = f"{cls.BASE_URL}?__call=playlist.getDetails&_format=json&cc=in&_marker=0%3F_marker%3D0&listid={playlist_id}"
-            response = requests.get(
-                playlist_url, timeout=settings.REQUEST_TIMEOUT
-            )
-            playlist_data = response.text.encode().decode("unicode-escape")
-            playlist_data = json.loads(playlist_data)
+            response = UpstreamClient.get(playlist_url)
+            with span("decode", call="playlist.getDetails"):
+                playlist_data = response.text.encode().decode("unicode-escape")
+                playlist_data = json.loads(playlist_data)
             # Process playlist data
             playlist_data["firstname"] = cls._format_string(
                 playlist_data["firstname"]
@@ -189,8 +366,9 @@ class SaavnService:
                 playlist_data["listname"]
             )
             # Process songs in the playlist
-            for song in playlist_data["songs"]:
-                cls.format_song_data(song, include_lyrics)
+            playlist_data["songs"] = cls._hydrate_songs(
+                playlist_data["songs"], include_lyrics
+            )
             return playlist_data
         except Exception as e:
             logger.error("Error fetching playlist details: %s", e)
@@ -206,11 +384,14 @@ class SaavnService:
             str: Song lyrics
         """
         try:
+            lyrics = cls._lyrics_cache.get(song_id)
+            if lyrics is not None:
+                return lyrics
             lyrics_url = f"{cls.BASE_URL}?__call=lyrics.getLyrics&ctx=web6dot0&api_version=4&_format=json&_marker=0%3F_marker%3D0&lyrics_id={song_id}"
-            response = requests.get(
-                lyrics_url, timeout=settings.REQUEST_TIMEOUT
-            )
-            lyrics_data = json.loads(response.text)
+            response = UpstreamClient.get(lyrics_url)
+            with span("decode", call="lyrics.getLyrics"):
+                lyrics_data = json.loads(response.text)
+            cls._lyrics_cache.put(song_id, lyrics_data["lyrics"])
             return lyrics_data["lyrics"]
         except Exception as e:
             logger.error("Error fetching lyrics: %s", e)
@@ -278,25 +459,26 @@ class SaavnService:
         """
         try:
             search_url = f"{cls.BASE_URL}?__call=autocomplete.get&_format=json&_marker=0&cc=in&includeMetaTags=1&query={query}"
-            response = requests.get(
-                search_url, timeout=settings.REQUEST_TIMEOUT
-            )
+            response = UpstreamClient.get(search_url)
             # Process response
-            response_text = response.text.encode().decode("unicode-escape")
-            response_text = re.sub(
-                r'\(From "([^"]+)"\)', r"(From '\1')", response_text
-            )
-            search_results = json.loads(response_text)
+            with span("decode", call="autocomplete.get"):
+                response_text = response.text.encode().decode("unicode-escape")
+                response_text = re.sub(
+                    r'\(From "([^"]+)"\)', r"(From '\1')", response_text
+                )
+                search_results = json.loads(response_text)
             song_results = search_results.get("songs", {}).get("data", [])
             # Return basic or full data
             if not full_data:
                 return song_results
-            songs = []
-            for song in song_results:
-                song_details = cls.get_song(song["id"], include_lyrics)
-                if song_details:
-                    songs.append(song_details)
-            return songs
+            songs = cls.get_songs(
+                [song["id"] for song in song_results], include_lyrics
+            )
+            return [
+                songs[song["id"]]
+                for song in song_results
+                if song["id"] in songs
+            ]
         except Exception as e:
             logger.error("Song search error: %s", e)
             raise
@@ -0,0 +1,241 @@
+"""
+Fake JioSaavn upstream for load testing.
+
+Serves the `api.php?__call=...` endpoints the API uses, plus the song, album
+and playlist pages used for ID resolution, from a synthetic catalogue.
+Latency, slow responses and errors are injected per request.
+
+Usage:
+    python benchmarks/fake_upstream.py --port 8765 --latency-ms 80 --error-rate 0.01
+
+Point the API at it with SAAVN_BASE_URL=http://127.0.0.1:8765/api.php.
+GET /__stats returns call counts; GET /__reset clears them.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+from collections import Counter
+from urllib.parse import parse_qs
+
+from pyDes import ECB, PAD_PKCS5, des
+
+
+def _encrypt_media_url(url: str) -> str:
+    cipher = des(b"38346591", ECB, b"\0" * 8, pad=None, padmode=PAD_PKCS5)
+    return base64.b64encode(cipher.encrypt(url.encode())).decode()
+
+
+class FakeSaavn:
+    """
+    ASGI application imitating the JioSaavn API.
+    """
+
+    def __init__(
+        self,
+        songs: int = 5000,
+        album_size: int = 12,
+        playlist_size: int = 50,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 20.0,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_ms: float = 2000.0,
+        seed: int = 0,
+    ):
+        self.songs = songs
+        self.album_size = album_size
+        self.playlist_size = playlist_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.errors = 0
+        self._media_url = _encrypt_media_url(
+            "https://aac.saavncdn.com/000/fake_96.mp4"
+        )
+
+    def song(self, song_id: str) -> dict:
+        number = song_id.lstrip("s")
+        return {
+            "id": song_id,
+            "song": f"Song {number} &amp; Friends",
+            "album": f"Album {number}",
+            "year": "2020",
+            "music": "Composer",
+            "primary_artists": "Artist &quot;One&quot;",
+            "singers": "Singer",
+            "starring": "",
+            "image": f"https://c.saavncdn.com/{number}-150x150.jpg",
+            "language": "hindi",
+            "duration": "210",
+            "320kbps": (
+                "true" if number.isdigit() and int(number) % 2 else "false"
+            ),
+            "has_lyrics": "true",
+            "copyright_text": "&copy; 2020 Label",
+            "encrypted_media_url": self._media_url,
+            "perma_url": f"https://www.jiosaavn.com/song/x/{song_id}",
+        }
+
+    def album(self, album_id: str) -> dict:
+        start = int(album_id) * self.album_size
+        return {
+            "albumid": album_id,
+            "name": f"Album {album_id}",
+            "year": "2020",
+            "primary_artists": "Artist",
+            "image": f"https://c.saavncdn.com/a{album_id}-150x150.jpg",
+            "songs": [
+                self.song(f"s{(start + i) % self.songs}")
+                for i in range(self.album_size)
+            ],
+        }
+
+    def playlist(self, playlist_id: str) -> dict:
+        picker = random.Random(int(playlist_id))
+        ids = picker.sample(range(self.songs), self.playlist_size)
+        return {
+            "listid": playlist_id,
+            "listname": f"Playlist {playlist_id}",
+            "firstname": "Curator",
+            "songs": [self.song(f"s{song_id}") for song_id in ids],
+        }
+
+    def handle_api(self, call: str, params: dict) -> object:
+        if call == "song.getDetails":
+            pids = params.get("pids", [""])[0].split(",")
+            return {pid: self.song(pid) for pid in pids if pid}
+        if call == "content.getAlbumDetails":
+            return self.album(params.get("albumid", ["0"])[0])
+        if call == "playlist.getDetails":
+            return self.playlist(params.get("listid", ["0"])[0])
+        if call == "lyrics.getLyrics":
+            return {"lyrics": "La la la<br>" * 20}
+        if call == "autocomplete.get":
+            query = params.get("query", [""])[0]
+            picker = random.Random(query)
+            return {
+                "songs": {
+                    "data": [
+                        {"id": f"s{picker.randrange(self.songs)}"}
+                        for _ in range(5)
+                    ]
+                }
+            }
+        return {}
+
+    def handle_page(self, path: str) -> str:
+        kind, _, page_id = path.strip("/").rpartition("/")
+        if kind.startswith("album"):
+            return f'<script>{{"album_id":"{page_id}"}}</script>'
+        if kind.startswith("playlist"):
+            return f'<script>{{"type":"playlist","id":"{page_id}"}}</script>'
+        return f'<script>{{"pid":"{page_id}"}}</script>'
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        path = scope["path"]
+        params = parse_qs(scope["query_string"].decode())
+        if path == "/__stats":
+            body = json.dumps(
+                {
+                    "calls": sum(self.calls.values()),
+                    "errors": self.errors,
+                    "by_call": dict(self.calls),
+                }
+            )
+            return await self._respond(send, 200, body, "application/json")
+        if path == "/__reset":
+            self.calls.clear()
+            self.errors = 0
+            return await self._respond(send, 200, "{}", "application/json")
+
+        call = params.get("__call", ["page"])[0]
+        self.calls[call] += 1
+        delay = self.latency_ms + self.random.uniform(
+            -self.jitter_ms, self.jitter_ms
+        )
+        if self.random.random() < self.slow_rate:
+            delay = self.slow_ms
+        await asyncio.sleep(max(delay, 0) / 1000)
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return await self._respond(
+                send, 503, "upstream error", "text/plain"
+            )
+        if call == "page":
+            return await self._respond(
+                send, 200, self.handle_page(path), "text/html"
+            )
+        body = json.dumps(self.handle_api(call, params))
+        return await self._respond(send, 200, body, "application/json")
+
+    @staticmethod
+    async def _respond(send, status: int, body: str, content_type: str):
+        payload = body.encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", content_type.encode()),
+                    (b"content-length", str(len(payload)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--songs", type=int, default=5000)
+    parser.add_argument("--album-size", type=int, default=12)
+    parser.add_argument("--playlist-size", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = FakeSaavn(
+        songs=args.songs,
+        album_size=args.album_size,
+        playlist_size=args.playlist_size,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        seed=args.seed,
+    )
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        access_log=False,
+        backlog=4096,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+"""
+Scenario-driven load test for the API against a fake JioSaavn upstream.
+
+Starts benchmarks/fake_upstream.py in a subprocess, points SAAVN_BASE_URL at
+it and drives weighted request mixes from benchmarks/scenarios.json at
+create_app() in-process (or at a running server with --target). Reports
+throughput, latency percentiles, upstream call amplification and memory growth.
+With --target, memory is only measured when --target-pid names the server
+process; its RSS and that of its worker processes are summed.
+
+Usage:
+    python benchmarks/load_test.py --list
+    python benchmarks/load_test.py mixed [--duration 30] [--concurrency 32]
+    python benchmarks/load_test.py mixed --target http://127.0.0.1:8000 \
+        [--target-pid 1234]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = os.path.join(ROOT, "benchmarks", "scenarios.json")
+UPSTREAM_TIMING = re.compile(r'upstream;dur=[\d.]+;desc="(\d+)x"')
+
+DEFAULT_CATALOGUE = {
+    "songs": 5000,
+    "albums": 500,
+    "playlists": 200,
+    "album_size": 12,
+    "playlist_size": 50,
+    "skew": 1.0,
+}
+
+
+def rss_mb(pid: str = "self") -> Optional[float]:
+    """
+    Current resident set size of a process.
+    Args:
+        pid (str): Process ID. Defaults to this process.
+    Returns:
+        Optional[float]: RSS in MiB, or None if it cannot be read
+    """
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def tree_rss_mb(pid: int) -> Optional[float]:
+    """
+    Resident set size of a process and all of its descendants, e.g. a
+    server and its worker processes.
+    Args:
+        pid (int): Root process ID
+    Returns:
+        Optional[float]: Total RSS in MiB, or None if the root cannot be read
+    """
+    total = rss_mb(str(pid))
+    if total is None:
+        return None
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return total
+    for task in tasks:
+        try:
+            with open(
+                f"/proc/{pid}/task/{task}/children", encoding="utf-8"
+            ) as children:
+                child_pids = children.read().split()
+        except OSError:
+            continue
+        for child in child_pids:
+            total += tree_rss_mb(int(child)) or 0.0
+    return total
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process.
+    Returns:
+        float: Peak RSS in MiB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of sorted samples.
+    Args:
+        samples (List[float]): Sorted samples
+        p (float): Percentile between 0 and 100
+    Returns:
+        float: Percentile value, 0 if there are no samples
+    """
+    if not samples:
+        return 0.0
+    rank = min(int(len(samples) * p / 100), len(samples) - 1)
+    return samples[rank]
+
+
+class RequestMix:
+    """
+    Weighted request generator for a scenario.
+    """
+
+    def __init__(self, scenario: Dict, upstream_url: str, seed: int):
+        self.entries = scenario["mix"]
+        self.weights = list(
+            itertools.accumulate(entry["weight"] for entry in self.entries)
+        )
+        self.catalogue = {**DEFAULT_CATALOGUE, **scenario.get("catalogue", {})}
+        self.upstream_url = upstream_url
+        self.random = random.Random(seed)
+        self._popularity = {}
+
+    def _pick(self, size: int) -> int:
+        """
+        Pick a catalogue item with Zipf-like popularity.
+        Args:
+            size (int): Number of items
+        Returns:
+            int: Item index
+        """
+        if size not in self._popularity:
+            skew = self.catalogue["skew"]
+            self._popularity[size] = list(
+                itertools.accumulate(
+                    1 / (rank**skew) for rank in range(1, size + 1)
+                )
+            )
+        return self.random.choices(
+            range(size), cum_weights=self._popularity[size]
+        )[0]
+
+    def next(self) -> tuple:
+        """
+        Build the next request.
+        Returns:
+            tuple: (route label, path, query parameters)
+        """
+        entry = self.random.choices(self.entries, cum_weights=self.weights)[0]
+        route = entry["route"]
+        params = dict(entry.get("params", {}))
+        catalogue = self.catalogue
+        if route == "/song/":
+            params["query"] = f"song {self._pick(catalogue['songs'])}"
+        elif route == "/song/get":
+            params["song_id"] = f"s{self._pick(catalogue['songs'])}"
+        elif route == "/album/":
+            album = self._pick(catalogue["albums"])
+            params["query"] = f"{self.upstream_url}/album/x/{album}"
+        elif route == "/playlist/":
+            playlist = self._pick(catalogue["playlists"])
+            params["query"] = f"{self.upstream_url}/playlist/x/{playlist}"
+        elif route == "/lyrics/":
+            params["query"] = f"s{self._pick(catalogue['songs'])}"
+        label = route + (
+            "?" + "&".join(f"{k}={v}" for k, v in entry["params"].items())
+            if entry.get("params")
+            else ""
+        )
+        return label, route, params
+
+
+class Recorder:
+    """
+    Per-route latency, status and upstream call counts.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.upstream_calls: Dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    def record(
+        self,
+        label: str,
+        latency: float,
+        status: str,
+        upstream_calls: Optional[int],
+    ) -> None:
+        if not self.recording:
+            return
+        self.latencies[label].append(latency)
+        self.statuses[label][status] += 1
+        if upstream_calls is not None:
+            self.upstream_calls[label] += upstream_calls
+
+
+async def virtual_user(
+    user_id: int,
+    client: httpx.AsyncClient,
+    mix: RequestMix,
+    recorder: Recorder,
+    stop_at: float,
+    think_time: float,
+) -> None:
+    """
+    Send requests back to back until the scenario ends.
+    Args:
+        user_id (int): Virtual user number, used as its API key
+        client (httpx.AsyncClient): Client bound to the API
+        mix (RequestMix): Request generator
+        recorder (Recorder): Result sink
+        stop_at (float): Monotonic deadline
+        think_time (float): Seconds to pause between requests
+    """
+    headers = {"X-API-Key": f"load-test-{user_id}"}
+    while time.monotonic() < stop_at:
+        label, path, params = mix.next()
+        started = time.perf_counter()
+        upstream_calls = None
+        try:
+            response = await client.get(path, params=params, headers=headers)
+            status = str(response.status_code)
+            timing = UPSTREAM_TIMING.search(
+                response.headers.get("server-timing", "")
+            )
+            upstream_calls = int(timing.group(1)) if timing else 0
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        recorder.record(
+            label, time.perf_counter() - started, status, upstream_calls
+        )
+        if think_time:
+            await asyncio.sleep(think_time)
+
+
+def start_upstream(scenario: Dict, port: int) -> subprocess.Popen:
+    """
+    Start the fake upstream for a scenario and wait until it answers.
+    Args:
+        scenario (Dict): Scenario definition
+        port (int): Port to listen on
+    Returns:
+        subprocess.Popen: Fake upstream process
+    """
+    catalogue = {**DEFAULT_CATALOGUE, **scenario.get("catalogue", {})}
+    upstream = scenario.get("upstream", {})
+    command = [
+        sys.executable,
+        os.path.join(ROOT, "benchmarks", "fake_upstream.py"),
+        "--port",
+        str(port),
+        "--songs",
+        str(catalogue["songs"]),
+        "--album-size",
+        str(catalogue["album_size"]),
+        "--playlist-size",
+        str(catalogue["playlist_size"]),
+    ]
+    for key, value in upstream.items():
+        command += [f"--{key.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/__stats", timeout=1)
+            return process
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Fake upstream did not start")
+
+
+def upstream_stats(port: int) -> Dict:
+    """
+    Call counts reported by the fake upstream.
+    Args:
+        port (int): Fake upstream port
+    Returns:
+        Dict: Total calls, injected errors and calls per __call
+    """
+    return httpx.get(f"http://127.0.0.1:{port}/__stats", timeout=5).json()
+
+
+async def run_scenario(
+    scenario: Dict,
+    port: int,
+    target: Optional[str],
+    seed: int,
+    target_pid: Optional[int] = None,
+) -> Dict:
+    """
+    Run a scenario and collect the results.
+    Args:
+        scenario (Dict): Scenario definition
+        port (int): Fake upstream port
+        target (str, optional): Base URL of a running server. Defaults to in-process.
+        seed (int): Random seed for the request mix
+        target_pid (int, optional): PID of the target server, for memory sampling
+    Returns:
+        Dict: Report data
+    """
+
+    def sample_rss() -> Optional[float]:
+        if not target:
+            return rss_mb()
+        return tree_rss_mb(target_pid) if target_pid else None
+
+    upstream_url = f"http://127.0.0.1:{port}"
+    concurrency = scenario["concurrency"]
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    timeout = httpx.Timeout(60.0)
+    lifespan = None
+    if target:
+        client = httpx.AsyncClient(
+            base_url=target, limits=limits, timeout=timeout
+        )
+    else:
+        os.environ["SAAVN_BASE_URL"] = f"{upstream_url}/api.php"
+        os.environ["SERVER_TIMING"] = "true"
+        # Keep per-request client and app logs from drowning the report
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        # Give every virtual user its own budget, as separate clients would
+        os.environ["API_KEYS"] = ",".join(
+            f"load-test-{i}" for i in range(concurrency)
+        )
+        os.environ.setdefault("TRACE_LOG_THRESHOLD_MS", "1e9")
+        for key, value in scenario.get("env", {}).items():
+            os.environ[key] = str(value)
+        sys.path.insert(0, ROOT)
+        from main import create_app
+
+        app = create_app()
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://load-test",
+            timeout=timeout,
+        )
+
+    recorder = Recorder()
+    mix = RequestMix(scenario, upstream_url, seed)
+    think_time = scenario.get("think_time_ms", 0) / 1000
+    warmup = scenario.get("warmup", 0)
+    duration = scenario["duration"]
+    started = time.monotonic()
+    stop_at = started + warmup + duration
+    users = [
+        asyncio.create_task(
+            virtual_user(i, client, mix, recorder, stop_at, think_time)
+        )
+        for i in range(concurrency)
+    ]
+    await asyncio.sleep(warmup)
+    upstream_before = await asyncio.to_thread(upstream_stats, port)
+    rss_before = sample_rss()
+    recorder.recording = True
+    measured_from = time.monotonic()
+    await asyncio.gather(*users)
+    elapsed = time.monotonic() - measured_from
+    upstream_after = await asyncio.to_thread(upstream_stats, port)
+    rss_after = sample_rss()
+
+    await client.aclose()
+    if lifespan is not None:
+        await lifespan.__aexit__(None, None, None)
+
+    routes = {}
+    for label, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        count = len(latencies)
+        ok = recorder.statuses[label].get("200", 0)
+        routes[label] = {
+            "requests": count,
+            "rps": round(count / elapsed, 2),
+            "ok": ok,
+            "statuses": dict(recorder.statuses[label]),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+            "upstream_per_request": round(
+                recorder.upstream_calls[label] / count, 2
+            ),
+        }
+    total_requests = sum(route["requests"] for route in routes.values())
+    upstream_calls = upstream_after["calls"] - upstream_before["calls"]
+    all_latencies = sorted(
+        itertools.chain.from_iterable(recorder.latencies.values())
+    )
+    return {
+        "duration_s": round(elapsed, 1),
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "rps": round(total_requests / elapsed, 2),
+        "p50_ms": round(percentile(all_latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(all_latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 1),
+        "upstream_calls": upstream_calls,
+        "upstream_errors": upstream_after["errors"]
+        - upstream_before["errors"],
+        "amplification": round(upstream_calls / max(total_requests, 1), 2),
+        "rss_before_mb": rss_before and round(rss_before, 1),
+        "rss_after_mb": rss_after and round(rss_after, 1),
+        "rss_growth_mb": (
+            round(rss_after - rss_before, 1)
+            if rss_before is not None and rss_after is not None
+            else None
+        ),
+        "peak_rss_mb": None if target else round(peak_rss_mb(), 1),
+        "routes": routes,
+    }
+
+
+def print_report(name: str, report: Dict) -> None:
+    print(
+        f"\nscenario {name}: {report['requests']} requests in "
+        f"{report['duration_s']}s with {report['concurrency']} users"
+    )
+    print(
+        f"  throughput {report['rps']} req/s, latency p50 {report['p50_ms']}ms "
+        f"p90 {report['p90_ms']}ms p99 {report['p99_ms']}ms"
+    )
+    print(
+        f"  upstream {report['upstream_calls']} calls "
+        f"({report['upstream_errors']} injected errors), "
+        f"amplification {report['amplification']} calls/request"
+    )
+    if report["rss_growth_mb"] is None:
+        print("  memory not measured (pass --target-pid with --target)")
+    else:
+        peak = report["peak_rss_mb"]
+        print(
+            f"  memory rss {report['rss_before_mb']} -> "
+            f"{report['rss_after_mb']} MiB "
+            f"(growth {report['rss_growth_mb']}"
+            + (f", peak {peak})" if peak is not None else ")")
+        )
+    header = (
+        f"  {'route':<28}{'req':>7}{'rps':>9}{'ok%':>7}"
+        f"{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'up/req':>8}"
+    )
+    print(header)
+    for label, route in report["routes"].items():
+        ok_pct = 100 * route["ok"] / route["requests"]
+        print(
+            f"  {label:<28}{route['requests']:>7}{route['rps']:>9}"
+            f"{ok_pct:>7.1f}{route['p50_ms']:>9}{route['p90_ms']:>9}"
+            f"{route['p99_ms']:>9}{route['max_ms']:>9}"
+            f"{route['upstream_per_request']:>8}"
+        )
+        errors = {
+            status: count
+            for status, count in route["statuses"].items()
+            if status != "200"
+        }
+        if errors:
+            print(f"  {'':<28}non-200: {errors}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenario", nargs="?", default="smoke")
+    parser.add_argument("--scenarios", default=SCENARIOS)
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--duration", type=float)
+    parser.add_argument("--warmup", type=float)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--upstream-port", type=int, default=8765)
+    parser.add_argument(
+        "--target", help="Base URL of a running server to test instead"
+    )
+    parser.add_argument(
+        "--target-pid",
+        type=int,
+        help="PID of the --target server, to report its memory growth",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    with open(args.scenarios, encoding="utf-8") as file:
+        scenarios = json.load(file)
+    if args.list:
+        for name, scenario in scenarios.items():
+            print(f"{name:<20}{scenario.get('description', '')}")
+        return
+    scenario = dict(scenarios[args.scenario])
+    for key in ("duration", "warmup", "concurrency"):
+        if getattr(args, key) is not None:
+            scenario[key] = getattr(args, key)
+
+    upstream = start_upstream(scenario, args.upstream_port)
+    try:
+        if args.target:
+            last_key = f"load-test-{scenario['concurrency'] - 1}"
+            print(
+                "Start the target with "
+                f"SAAVN_BASE_URL=http://127.0.0.1:{args.upstream_port}/api.php "
+                "SERVER_TIMING=true for per-route upstream counts and "
+                f"API_KEYS=load-test-0,...,{last_key} for per-user budgets"
+            )
+        report = asyncio.run(
+            run_scenario(
+                scenario,
+                args.upstream_port,
+                args.target,
+                args.seed,
+                args.target_pid,
+            )
+        )
+    finally:
+        upstream.terminate()
+        upstream.wait()
+    print_report(args.scenario, report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({args.scenario: report}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
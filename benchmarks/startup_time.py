@@ -0,0 +1,82 @@
+"""
+Measure cold-start time of the application.
+
+Each sample imports `main` (which builds the app) in a fresh interpreter,
+so the numbers include module imports and `create_app()`.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 10] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once() -> float:
+    """
+    Import the app in a fresh interpreter.
+    Returns:
+        float: Wall-clock seconds for the import
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import main"],
+        cwd=ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def slowest_imports(top: int) -> list:
+    """
+    Collect the slowest direct imports of `main` using `-X importtime`.
+    Args:
+        top (int): Number of entries to return
+    Returns:
+        list: (cumulative microseconds, module) tuples, slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        # Direct imports of main are indented by exactly one level
+        if module.startswith("   ") and not module.startswith("     "):
+            entries.append((int(cumulative), module.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    measure_once()  # warm the filesystem and bytecode caches
+    samples = [measure_once() for _ in range(args.runs)]
+    print(f"startup over {args.runs} runs:")
+    print(f"  min    {min(samples) * 1000:8.1f} ms")
+    print(f"  median {statistics.median(samples) * 1000:8.1f} ms")
+    print(f"  max    {max(samples) * 1000:8.1f} ms")
+    print("slowest imports from main:")
+    for cumulative, module in slowest_imports(args.top):
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
 import logging
 import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Dict, List, Union
 
-import markdown
-import requests
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 
 from app.config import settings
+from app.core.admission import AdmissionControl
 from app.core.exceptions import GlobalExceptionHandler
+from app.core.tracing import RequestTracing, configure_logging
 from app.routes import album_routes, lyrics_routes, playlist_routes, song_routes
+from app.services.http_client import UpstreamClient
 
 BASE_URL = settings.SAAVN_BASE_URL
 SAAVN_URLS = [
@@ -22,6 +26,35 @@ SAAVN_URLS = [
 ]
 
 
+@lru_cache(maxsize=1)
+def render_readme() -> str:
+    """
+    Render README.md to HTML once per process.
+    `markdown` is imported lazily so it does not add to cold-start time.
+    Returns:
+        str: Rendered HTML
+    """
+    import markdown
+
+    readme_path = os.path.join(os.path.dirname(__file__), "README.md")
+    with open(readme_path, "r", encoding="utf-8") as file:
+        return markdown.markdown(
+            file.read(), extensions=["fenced_code", "tables"]
+        )
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Application lifespan: drain in-flight upstream calls on shutdown.
+    """
+    yield
+    await run_in_threadpool(
+        UpstreamClient.drain, settings.UPSTREAM_DRAIN_TIMEOUT
+    )
+    UpstreamClient.close()
+
+
 def create_app() -> FastAPI:
     """
     Create and configure the FastAPI application.
@@ -29,10 +62,7 @@ def create_app() -> FastAPI:
         FastAPI: Configured FastAPI application instance
     """
     # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
+    configure_logging()
     logger = logging.getLogger(__name__)
     # Initialize FastAPI app
     fastapi_app = FastAPI(
@@ -41,7 +71,12 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
+    # Admission control (registered first so CORS headers wrap 429 responses)
+    admission = AdmissionControl(fastapi_app)
+    # Request IDs and tracing (wraps admission so queue time is included)
+    RequestTracing(fastapi_app)
     # Add CORS middleware
     fastapi_app.add_middleware(
         CORSMiddleware,
@@ -49,21 +84,16 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Request-ID", "Server-Timing"],
     )
     # Include global exception handler
     GlobalExceptionHandler(fastapi_app)
     # Include routers
     
     @fastapi_app.get("/", response_class=HTMLResponse, tags=["Root"])
-    async def read_root():
-        # Path to the README file
-        readme_path = os.path.join(os.path.dirname(__file__), "README.md")
+    def read_root():
         # Read and convert the README.md file to HTML
-        with open(readme_path, "r", encoding="utf-8") as file:
-            readme_content = file.read()
-            html_content = markdown.markdown(
-                readme_content, extensions=["fenced_code", "tables"]
-            )
+        html_content = render_readme()
         # Add custom links for API documentation
         html_page = f"""
         <html>
@@ -86,15 +116,17 @@ def create_app() -> FastAPI:
 
     # Health check
     @fastapi_app.get("/ping", tags=["Health Check"])
-    async def health_check() -> (
+    def health_check() -> (
         Dict[str, Union[str, List[Dict[str, Union[str, bool]]]]]
     ):
         """Health check endpoint to see if you can connect to JioSaavn."""
+        import requests
+
         health_status = []
 
         for url in SAAVN_URLS:
             try:
-                response = requests.get(url, timeout=settings.REQUEST_TIMEOUT)
+                response = UpstreamClient.get(url)
                 if response.status_code == 200:
                     health_status.append({"url": url, "status": "ok"})
                 else:
@@ -117,6 +149,12 @@ def create_app() -> FastAPI:
 
         return {"msg": "Pong!", "status": overall_status, "details": health_status}
 
+    # Admission metrics
+    @fastapi_app.get("/metrics", tags=["Health Check"])
+    async def admission_metrics() -> Dict[str, Union[int, float, None]]:
+        """Queue depth, wait times and shed counts for this worker."""
+        return admission.stats()
+
     fastapi_app.include_router(
         song_routes.router, prefix="/song", tags=["Songs"])
     fastapi_app.include_router(
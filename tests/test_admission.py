@@ -0,0 +1,196 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.core import admission as admission_module
+from app.core import cache as cache_module
+from app.core.admission import AdmissionControl, Overloaded, PriorityGate
+from app.services.http_client import _call_counter
+
+
+def make_app(upstream_calls: int = 0, status_code: int = 200) -> tuple:
+    """
+    Build a minimal app behind admission control.
+    Args:
+        upstream_calls (int): Upstream calls each /album/ request pretends to make
+        status_code (int): Status each /album/ request responds with
+    Returns:
+        tuple: (FastAPI app, AdmissionControl instance)
+    """
+    app = FastAPI()
+    admission = AdmissionControl(app)
+
+    @app.get("/album/")
+    def album():
+        _call_counter.get().count += upstream_calls
+        return JSONResponse({"status": "ok"}, status_code=status_code)
+
+    @app.get("/ping")
+    def ping():
+        return {"status": "ok"}
+
+    return app, admission
+
+
+def album_request() -> Request:
+    return Request(
+        {"type": "http", "path": "/album/", "query_string": b"", "headers": []}
+    )
+
+
+def test_cheapest_waiter_gets_the_next_slot():
+    async def scenario():
+        gate = PriorityGate(limit=1, max_queue=10)
+        await gate.acquire(1, timeout=1)
+        order = []
+
+        async def waiter(cost):
+            await gate.acquire(cost, timeout=1)
+            order.append(cost)
+
+        tasks = [asyncio.create_task(waiter(cost)) for cost in (50, 5, 20)]
+        await asyncio.sleep(0)
+        for _ in tasks:
+            gate.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == [5, 20, 50]
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        gate = PriorityGate(limit=1, max_queue=0)
+        await gate.acquire(1, timeout=1)
+        with pytest.raises(Overloaded) as error:
+            await gate.acquire(1, timeout=1)
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.reason == "queue_full"
+    assert error.retry_after == 1
+
+
+def test_full_queue_returns_429(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_REQUESTS", 0)
+    monkeypatch.setattr(settings, "MAX_QUEUE_DEPTH", 0)
+    app, admission = make_app()
+    client = TestClient(app)
+
+    response = client.get("/album/")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["details"] == "queue_full"
+    assert admission.stats()["shed_queue_full"] == 1
+    # Health checks bypass admission
+    assert client.get("/ping").status_code == 200
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    async def scenario():
+        gate = PriorityGate(limit=1, max_queue=10)
+        await gate.acquire(1, timeout=1)
+        with pytest.raises(Overloaded) as error:
+            await gate.acquire(1, timeout=0.01)
+        return gate, error.value
+
+    gate, error = asyncio.run(scenario())
+    assert error.reason == "queue_timeout"
+    assert gate.queue_depth == 0
+    assert gate.active == 1
+
+
+def test_slot_handed_over_at_timeout_is_released(monkeypatch):
+    gate = PriorityGate(limit=1, max_queue=10)
+
+    async def wait_for(future, timeout):
+        # The holder releases just as the waiter times out
+        gate.release()
+        assert future.done()
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        await gate.acquire(1, timeout=1)
+        monkeypatch.setattr(asyncio, "wait_for", wait_for)
+        with pytest.raises(Overloaded):
+            await gate.acquire(1, timeout=1)
+
+    asyncio.run(scenario())
+    assert gate.active == 0
+    assert gate.queue_depth == 0
+
+
+def test_budget_is_refunded_to_actual_cost(monkeypatch):
+    monkeypatch.setattr(settings, "CLIENT_BUDGET", 10)
+    monkeypatch.setattr(settings, "CLIENT_BUDGET_REFILL", 0.001)
+    app, admission = make_app(upstream_calls=1)
+    client = TestClient(app)
+
+    estimated = AdmissionControl.estimate_cost("/album/", {})
+    assert estimated > 1
+    assert client.get("/album/").status_code == 200
+    budget = admission._ip_budgets.get("ip:testclient")
+    assert budget.tokens == pytest.approx(9, abs=0.01)
+    # The next identical request is costed at what it actually used
+    assert admission._cost(album_request())[1] == 1
+
+
+class FakeClock:
+    """
+    Monotonic clock that tests can move forward.
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def monotonic(self) -> float:
+        return time.monotonic() + self.offset
+
+
+def test_budget_debt_outlives_the_full_refill_time(monkeypatch):
+    monkeypatch.setattr(settings, "CLIENT_BUDGET", 10)
+    monkeypatch.setattr(settings, "CLIENT_BUDGET_REFILL", 1.0)
+    clock = FakeClock()
+    monkeypatch.setattr(admission_module, "time", clock)
+    monkeypatch.setattr(cache_module, "time", clock)
+    app, admission = make_app(upstream_calls=30)
+    client = TestClient(app)
+
+    assert client.get("/album/").status_code == 200
+    budget = admission._ip_budgets.get("ip:testclient")
+    assert budget.tokens == pytest.approx(-20, abs=0.1)
+    # Longer than a full refill without debt, shorter than repaying it
+    clock.offset += 12
+    response = client.get("/album/")
+    assert response.status_code == 429
+    assert 17 <= int(response.headers["Retry-After"]) <= 19
+    clock.offset += 20
+    assert client.get("/album/").status_code == 200
+
+
+def test_failed_requests_do_not_set_the_observed_cost(monkeypatch):
+    app, admission = make_app(upstream_calls=1, status_code=500)
+    client = TestClient(app)
+
+    assert client.get("/album/").status_code == 500
+    assert admission._cost(album_request())[1] == (
+        AdmissionControl.estimate_cost("/album/", {})
+    )
+
+
+def test_unknown_api_keys_share_the_ip_budget(monkeypatch):
+    monkeypatch.setattr(settings, "API_KEYS", "known")
+    app, admission = make_app(upstream_calls=1)
+    client = TestClient(app)
+
+    client.get("/album/", headers={"X-API-Key": "known"})
+    client.get("/album/", headers={"X-API-Key": "rotated-1"})
+    client.get("/album/", headers={"X-API-Key": "rotated-2"})
+    assert len(admission._key_budgets) == 1
+    assert len(admission._ip_budgets) == 1
@@ -0,0 +1,148 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.core.cache import RecordCache
+from app.services.saavn_service import SaavnService
+
+
+class FakeUpstream:
+    """
+    Stand-in for song.getDetails that records the IDs of every call.
+    """
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.started = threading.Event()
+        self._lock = threading.Lock()
+
+    def fetch(self, song_ids):
+        with self._lock:
+            self.calls.append(list(song_ids))
+        self.started.set()
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {song_id: {"id": song_id} for song_id in song_ids}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Fresh song caches and a fake upstream for each test.
+    """
+    fake = FakeUpstream()
+    monkeypatch.setattr(SaavnService, "_song_cache", RecordCache(60, 100))
+    monkeypatch.setattr(
+        SaavnService,
+        "_fetch_song_details",
+        classmethod(lambda cls, song_ids: fake.fetch(song_ids)),
+    )
+    monkeypatch.setattr(
+        SaavnService,
+        "format_song_data",
+        classmethod(lambda cls, raw: {**raw, "has_lyrics": "true"}),
+    )
+    monkeypatch.setattr(
+        SaavnService,
+        "get_lyrics",
+        classmethod(lambda cls, song_id: f"lyrics of {song_id}"),
+    )
+    return fake
+
+
+def run_concurrently(*calls):
+    """
+    Prepare a thread per callable and start the first one.
+    Returns:
+        tuple: (threads, list filled with each call's result or exception)
+    """
+    results = [None] * len(calls)
+
+    def run(index, call):
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = [
+        threading.Thread(target=run, args=(index, call))
+        for index, call in enumerate(calls)
+    ]
+    threads[0].start()
+    return threads, results
+
+
+def test_concurrent_requests_share_one_fetch(upstream):
+    upstream.delay = 0.2
+    threads, results = run_concurrently(
+        lambda: SaavnService.get_songs(["a", "b"]),
+        lambda: SaavnService.get_songs(["b", "a"]),
+        lambda: SaavnService.get_songs(["b", "c"]),
+    )
+    upstream.started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Only the song nobody was fetching yet needs a second call
+    assert upstream.calls == [["a", "b"], ["c"]]
+    assert sorted(results[0]) == sorted(results[1]) == ["a", "b"]
+    assert sorted(results[2]) == ["b", "c"]
+
+
+def test_failed_fetch_reaches_waiters_and_frees_keys(upstream):
+    upstream.delay = 0.2
+    upstream.error = RuntimeError("upstream down")
+    threads, results = run_concurrently(
+        lambda: SaavnService.get_songs(["a"]),
+        lambda: SaavnService.get_songs(["a"]),
+    )
+    upstream.started.wait(1)
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == [["a"]]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert SaavnService._song_cache._pending == {}
+
+    upstream.delay, upstream.error = 0.0, None
+    assert list(SaavnService.get_songs(["a"])) == ["a"]
+    assert upstream.calls == [["a"], ["a"]]
+
+
+def test_fallback_songs_are_not_cached(upstream):
+    upstream.error = RuntimeError("upstream down")
+    songs = SaavnService.get_songs(["a"], fallback={"a": {"id": "a"}})
+
+    assert songs["a"]["id"] == "a"
+    assert SaavnService._song_cache.get("a") is None
+    assert SaavnService._song_cache._pending == {}
+
+
+def test_lyrics_do_not_leak_into_the_cache(upstream):
+    with_lyrics = SaavnService.get_songs(["a"], include_lyrics=True)
+    without_lyrics = SaavnService.get_songs(["a"])
+
+    assert with_lyrics["a"]["lyrics"] == "lyrics of a"
+    assert "lyrics" not in without_lyrics["a"]
+    assert "lyrics" not in SaavnService._song_cache.get("a")
+    assert upstream.calls == [["a"]]
+
+
+def test_map_concurrently_keeps_order_and_context():
+    marker = contextvars.ContextVar("marker", default=None)
+    marker.set("request")
+
+    def work(item):
+        time.sleep(0.01 * (5 - item))
+        return item, marker.get()
+
+    results = SaavnService._map_concurrently(work, list(range(5)))
+    assert results == [(item, "request") for item in range(5)]
@@ -0,0 +1,108 @@
+import logging
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.core import tracing
+from app.core.exceptions import GlobalExceptionHandler
+from app.core.tracing import TracedRoute, RequestTracing, span
+
+
+@pytest.fixture
+def traced_app():
+    """
+    Minimal app with tracing, the global exception handler and a probe that
+    records the trace context left behind after each request.
+    Returns:
+        tuple: (TestClient, list of trace context values seen after requests)
+    """
+    app = FastAPI()
+    RequestTracing(app)
+    GlobalExceptionHandler(app)
+    router = APIRouter(route_class=TracedRoute)
+
+    @router.get("/song/")
+    def song():
+        with span("upstream", call="song.getDetails"):
+            pass
+        return {"status": "ok"}
+
+    @router.get("/boom")
+    def boom():
+        raise RuntimeError("kaboom")
+
+    app.include_router(router)
+    leftovers = []
+
+    async def probe(scope, receive, send):
+        try:
+            await app(scope, receive, send)
+        finally:
+            if scope["type"] == "http":
+                leftovers.append(tracing._trace.get())
+
+    return TestClient(probe, raise_server_exceptions=False), leftovers
+
+
+def test_request_id_is_echoed(traced_app):
+    client, _ = traced_app
+    response = client.get("/song/", headers={"X-Request-ID": "abc123"})
+    assert response.headers["X-Request-ID"] == "abc123"
+
+
+def test_request_id_is_generated(traced_app):
+    client, _ = traced_app
+    first = client.get("/song/").headers["X-Request-ID"]
+    second = client.get("/song/").headers["X-Request-ID"]
+    assert len(first) == 32
+    assert first != second
+
+
+def test_server_timing_requires_matching_token(traced_app, monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_TIMING", False)
+    monkeypatch.setattr(settings, "SERVER_TIMING_TOKEN", "s3cret")
+    client, _ = traced_app
+
+    timing = client.get(
+        "/song/", headers={"X-Server-Timing-Token": "s3cret"}
+    ).headers.get("Server-Timing")
+    assert "upstream;" in timing
+    assert "endpoint;" in timing
+    assert "total;" in timing
+    for token in ("wrong", ""):
+        response = client.get(
+            "/song/", headers={"X-Server-Timing-Token": token}
+        )
+        assert "Server-Timing" not in response.headers
+    assert "Server-Timing" not in client.get("/song/").headers
+
+
+@pytest.mark.parametrize("token", ["", "anything"])
+def test_server_timing_is_off_without_configured_token(
+    traced_app, monkeypatch, token
+):
+    monkeypatch.setattr(settings, "SERVER_TIMING", False)
+    monkeypatch.setattr(settings, "SERVER_TIMING_TOKEN", "")
+    client, _ = traced_app
+    response = client.get("/song/", headers={"X-Server-Timing-Token": token})
+    assert "Server-Timing" not in response.headers
+
+
+def test_trace_context_is_reset_after_request(traced_app):
+    client, leftovers = traced_app
+    client.get("/song/")
+    client.get("/boom")
+    assert leftovers == [None, None]
+
+
+def test_exception_handler_reports_request_id(traced_app, caplog):
+    client, _ = traced_app
+    with caplog.at_level(logging.ERROR, logger="app.core.exceptions"):
+        response = client.get("/boom", headers={"X-Request-ID": "req-1"})
+
+    assert response.status_code == 500
+    assert response.headers["X-Request-ID"] == "req-1"
+    assert response.json()["request_id"] == "req-1"
+    assert [record.request_id for record in caplog.records] == ["req-1"]